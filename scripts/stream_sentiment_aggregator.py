@@ -0,0 +1,436 @@
+"""Streaming intraday sentiment aggregation.
+
+Consumes headlines from a tailed CSV file (same columns as
+cleaned_analyst_ratings.csv) or from a socket emitting one JSON object per
+line ({"headline": ..., "date": ..., "stock": ...}), scores each headline
+with TextBlob and keeps per-ticker rolling state updated in O(1) per event.
+
+Usage:
+    python scripts/stream_sentiment_aggregator.py --file data/cleaned_data/cleaned_analyst_ratings.csv
+    python scripts/stream_sentiment_aggregator.py --socket localhost:9000 --half-life 1800
+
+Send SIGUSR1 to the process to write a snapshot on demand, even while the
+stream is idle. On exit (EOF with --no-follow, or Ctrl+C) the per-day averages
+are written in the same format as aggregate_daily_sentiment_scores.csv.
+
+Per-day averages use the date of each timestamp in its own offset, as the
+batch script does. Hourly and session buckets (and EWMA ordering) use US/Eastern
+wall-clock time, so tz-aware and naive dates share one trading calendar.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import signal
+import socket
+import time
+
+import pandas as pd
+from textblob import TextBlob
+
+REGULAR_OPEN = (9, 30)
+REGULAR_CLOSE = (16, 0)
+MARKET_TZ = 'America/New_York'
+SESSIONS = ('pre_market', 'regular', 'after_hours')
+
+
+def score_headline(text):
+    """Return TextBlob polarity for a headline, or None if it is empty."""
+    if isinstance(text, str) and text.strip():
+        return TextBlob(text).sentiment.polarity
+    return None
+
+
+def parse_timestamp(value):
+    """Parse a date as pd.to_datetime does, keeping its offset, or None if invalid."""
+    try:
+        ts = pd.to_datetime(value, errors='coerce')
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if not isinstance(ts, pd.Timestamp) or pd.isna(ts):
+        return None
+    return ts
+
+
+def to_market_time(ts: pd.Timestamp) -> pd.Timestamp:
+    """Convert to naive US/Eastern wall-clock time; naive input is taken as Eastern."""
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(MARKET_TZ).tz_localize(None)
+    return ts
+
+
+def trading_session(ts: pd.Timestamp) -> str:
+    """Classify a timestamp (in its own timezone) as pre/regular/after hours."""
+    hm = (ts.hour, ts.minute)
+    if hm < REGULAR_OPEN:
+        return 'pre_market'
+    if hm < REGULAR_CLOSE:
+        return 'regular'
+    return 'after_hours'
+
+
+class RunningMean:
+    """Count and compensated (Neumaier) sum, so the mean tracks the batch result."""
+
+    __slots__ = ('count', 'total', '_comp')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self._comp = 0.0
+
+    def add(self, value: float) -> None:
+        t = self.total + value
+        if abs(self.total) >= abs(value):
+            self._comp += (self.total - t) + value
+        else:
+            self._comp += (value - t) + self.total
+        self.total = t
+        self.count += 1
+
+    @property
+    def sum(self) -> float:
+        return self.total + self._comp
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else float('nan')
+
+
+class TickerState:
+    """Rolling sentiment state for a single ticker.
+
+    Per-day count/sum is kept for every day (it is the end-of-day output).
+    Hourly and session buckets are only kept for the current day, the market
+    date of the newest headline, and are handed back by `update` once a newer
+    day starts. Late headlines for earlier days only reach the daily, overall
+    and EWMA state.
+    """
+
+    def __init__(self, half_life: float):
+        if half_life <= 0:
+            raise ValueError(f"half_life must be positive, got {half_life}")
+        self.half_life = half_life
+        self.overall = RunningMean()
+        self.daily = {}
+        self.open_day = None
+        self.hourly = {}
+        self.sessions = {}
+        self._ewma_sum = 0.0
+        self._ewma_weight = 0.0
+        self.last_ts = None
+
+    def update(self, ts: pd.Timestamp, day, polarity: float):
+        """Fold one scored headline in.
+
+        `ts` is the market (US/Eastern) time and `day` the end-of-day key.
+        Returns the (hourly, sessions) buckets of the previous day if this
+        event started a newer day, otherwise None.
+        """
+        market_day = ts.date()
+        session = trading_session(ts)
+
+        # EWMA as a decayed weighted sum / weight referenced at `last_ts`: each
+        # headline weighs 0.5 ** ((last_ts - ts) / half_life), whatever order
+        # the headlines arrive in.
+        if self.last_ts is None:
+            ewma_sum, ewma_weight, last_ts = polarity, 1.0, ts
+        elif ts >= self.last_ts:
+            decay = math.pow(0.5, (ts - self.last_ts).total_seconds() / self.half_life)
+            ewma_sum = self._ewma_sum * decay + polarity
+            ewma_weight = self._ewma_weight * decay + 1.0
+            last_ts = ts
+        else:
+            weight = math.pow(0.5, (self.last_ts - ts).total_seconds() / self.half_life)
+            ewma_sum = self._ewma_sum + weight * polarity
+            ewma_weight = self._ewma_weight + weight
+            last_ts = self.last_ts
+
+        closed = None
+        if self.open_day is not None and market_day > self.open_day:
+            closed = (self.hourly, self.sessions)
+            self.hourly, self.sessions = {}, {}
+        if self.open_day is None or market_day >= self.open_day:
+            self.open_day = market_day
+            self.hourly.setdefault(ts.hour, RunningMean()).add(polarity)
+            self.sessions.setdefault(session, RunningMean()).add(polarity)
+
+        self.overall.add(polarity)
+        self.daily.setdefault(day, RunningMean()).add(polarity)
+        self._ewma_sum, self._ewma_weight, self.last_ts = ewma_sum, ewma_weight, last_ts
+        return closed
+
+    @property
+    def ewma(self) -> float:
+        return self._ewma_sum / self._ewma_weight if self._ewma_weight else float('nan')
+
+
+class StreamingSentimentAggregator:
+    """Per-ticker streaming aggregation of headline sentiment."""
+
+    def __init__(self, half_life: float = 3600.0):
+        if half_life <= 0:
+            raise ValueError(f"half_life must be positive, got {half_life}")
+        self.half_life = half_life
+        self.tickers = {}
+        self.events = 0
+        self.skipped = 0
+        self._closed_hourly = []
+        self._closed_sessions = []
+
+    def process(self, headline, date, stock) -> bool:
+        """Score and fold one headline in. Returns False if the row was skipped."""
+        ts = parse_timestamp(date)
+        polarity = score_headline(headline)
+        if ts is None or polarity is None or not isinstance(stock, str) or not stock:
+            self.skipped += 1
+            return False
+        state = self.tickers.get(stock)
+        if state is None:
+            state = self.tickers[stock] = TickerState(self.half_life)
+        day = state.open_day
+        closed = state.update(to_market_time(ts), ts.date(), polarity)
+        if closed is not None:
+            self._collect(stock, day, *closed)
+        self.events += 1
+        return True
+
+    def _collect(self, stock, day, hourly, sessions) -> None:
+        self._closed_hourly.extend(
+            (stock, day, hour, b.count, b.sum, b.mean) for hour, b in hourly.items()
+        )
+        self._closed_sessions.extend(
+            (stock, day, session, b.count, b.sum, b.mean) for session, b in sessions.items()
+        )
+
+    def drain_intraday(self, include_open: bool = False):
+        """Return and forget (hourly, sessions) DataFrames for closed days.
+
+        With `include_open`, the buckets of each ticker's current day are
+        flushed too (used at shutdown).
+        """
+        if include_open:
+            for stock, state in self.tickers.items():
+                if state.hourly or state.sessions:
+                    self._collect(stock, state.open_day, state.hourly, state.sessions)
+                    state.hourly, state.sessions = {}, {}
+        hourly = pd.DataFrame(
+            self._closed_hourly, columns=['Stock', 'Date', 'Hour', 'Count', 'Sum', 'Avg_Sentiment'])
+        sessions = pd.DataFrame(
+            self._closed_sessions, columns=['Stock', 'Date', 'Session', 'Count', 'Sum', 'Avg_Sentiment'])
+        self._closed_hourly, self._closed_sessions = [], []
+        return hourly, sessions
+
+    def snapshot(self) -> pd.DataFrame:
+        """Current per-ticker state, with buckets for the day being received."""
+        rows = []
+        for stock in sorted(self.tickers):
+            state = self.tickers[stock]
+            day_count = sum(b.count for b in state.sessions.values())
+            day_sum = sum(b.sum for b in state.sessions.values())
+            row = {
+                'Stock': stock,
+                'Last_Update': state.last_ts,
+                'Count': state.overall.count,
+                'Sum': state.overall.sum,
+                'Mean': state.overall.mean,
+                'EWMA': state.ewma,
+                'Day': state.open_day,
+                'Day_Count': day_count,
+                'Day_Avg_Sentiment': day_sum / day_count if day_count else float('nan'),
+            }
+            for session in SESSIONS:
+                bucket = state.sessions.get(session)
+                row[f'{session}_Avg'] = bucket.mean if bucket else float('nan')
+            bucket = state.hourly.get(state.last_ts.hour)
+            row['Hour_Avg'] = bucket.mean if bucket else float('nan')
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def daily_sentiment(self) -> pd.DataFrame:
+        """End-of-day output matching aggregate_daily_sentiment_scores.csv."""
+        rows = [
+            (stock, day, b.mean)
+            for stock, state in self.tickers.items()
+            for day, b in state.daily.items()
+        ]
+        df = pd.DataFrame(rows, columns=['Stock', 'Date', 'Avg_Sentiment'])
+        return df.sort_values(['Stock', 'Date']).reset_index(drop=True)
+
+
+def _idle(on_idle, poll_interval: float) -> None:
+    if on_idle is not None:
+        on_idle()
+    time.sleep(poll_interval)
+
+
+def tail_lines(path: str, follow: bool = True, poll_interval: float = 0.5, on_idle=None):
+    """Yield complete lines from a file, waiting for new data if `follow` is set.
+
+    `on_idle` is called each time the tail is waiting for data.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File not found: {path}")
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        pending = ''
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow:
+                    if pending:
+                        yield pending
+                    return
+                _idle(on_idle, poll_interval)
+                continue
+            pending += line
+            if pending.endswith('\n'):
+                yield pending
+                pending = ''
+
+
+def file_events(path: str, follow: bool = True, poll_interval: float = 0.5, on_idle=None):
+    """Yield (headline, date, stock) rows from a tailed CSV file."""
+    reader = csv.DictReader(tail_lines(path, follow, poll_interval, on_idle))
+    for row in reader:
+        yield row.get('headline'), row.get('date'), row.get('stock')
+
+
+def parse_json_record(line):
+    """Parse one JSON line into (headline, date, stock).
+
+    Malformed lines and non-object values give (None, None, None), which the
+    aggregator counts as skipped.
+    """
+    try:
+        record = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        record = None
+    if not isinstance(record, dict):
+        print(f"⚠️ Skipping malformed line: {line.strip()[:80]!r}")
+        return None, None, None
+    return record.get('headline'), record.get('date'), record.get('stock')
+
+
+def socket_events(address: str, poll_interval: float = 0.5, on_idle=None):
+    """Yield (headline, date, stock) rows from a JSON-lines TCP stream.
+
+    `on_idle` is called whenever no data arrived for `poll_interval` seconds.
+    """
+    host, port = address.rsplit(':', 1)
+    with socket.create_connection((host, int(port))) as sock:
+        sock.settimeout(poll_interval)
+        buffer = b''
+        while True:
+            try:
+                chunk = sock.recv(65536)
+            except socket.timeout:
+                if on_idle is not None:
+                    on_idle()
+                continue
+            if not chunk:
+                break
+            *lines, buffer = (buffer + chunk).split(b'\n')
+            for line in lines:
+                if line.strip():
+                    yield parse_json_record(line)
+        if buffer.strip():
+            yield parse_json_record(buffer)
+
+
+def save_output(df: pd.DataFrame, output_path: str, append: bool = False) -> None:
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    if append and os.path.exists(output_path):
+        df.to_csv(output_path, mode='a', header=False, index=False)
+    else:
+        df.to_csv(output_path, index=False)
+    print(f"💾 Saved to: {output_path}")
+
+
+def positive_float(value: str) -> float:
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be a positive number, got {value}")
+    return number
+
+
+def non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be zero or a positive integer, got {value}")
+    return number
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming intraday sentiment aggregator")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--file', help="CSV file to tail (headline, date, stock columns)")
+    source.add_argument('--socket', help="host:port emitting JSON lines")
+    parser.add_argument('--no-follow', action='store_true', help="Stop at end of file instead of tailing")
+    parser.add_argument('--half-life', type=positive_float, default=3600.0, help="EWMA half-life in seconds")
+    parser.add_argument('--poll-interval', type=positive_float, default=0.5,
+                        help="Seconds to wait for new data before checking for snapshot requests")
+    parser.add_argument('--snapshot-every', type=non_negative_int, default=1000,
+                        help="Write a snapshot CSV every N headlines (0 to disable); SIGUSR1 writes one on demand")
+    parser.add_argument('--snapshot-path', default='./data/cleaned_data/stream_sentiment_snapshot.csv')
+    parser.add_argument('--hourly-path', default='./data/cleaned_data/stream_hourly_sentiment.csv')
+    parser.add_argument('--session-path', default='./data/cleaned_data/stream_session_sentiment.csv')
+    parser.add_argument('--output', default='./data/cleaned_data/aggregate_daily_sentiment_scores_stream.csv')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    aggregator = StreamingSentimentAggregator(half_life=args.half_life)
+    snapshot_requested = False
+    intraday_written = False
+
+    def request_snapshot(signum, frame):
+        nonlocal snapshot_requested
+        snapshot_requested = True
+
+    def write_snapshot():
+        save_output(aggregator.snapshot(), args.snapshot_path)
+
+    def flush_intraday(include_open=False):
+        nonlocal intraday_written
+        hourly, sessions = aggregator.drain_intraday(include_open)
+        if not hourly.empty or not sessions.empty or not intraday_written:
+            save_output(hourly, args.hourly_path, append=intraday_written)
+            save_output(sessions, args.session_path, append=intraday_written)
+            intraday_written = True
+
+    def on_idle():
+        # Runs between events only, so snapshots never see a half-applied update.
+        nonlocal snapshot_requested
+        if snapshot_requested:
+            snapshot_requested = False
+            write_snapshot()
+
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, request_snapshot)
+
+    if args.file:
+        events = file_events(args.file, follow=not args.no_follow,
+                             poll_interval=args.poll_interval, on_idle=on_idle)
+    else:
+        events = socket_events(args.socket, poll_interval=args.poll_interval, on_idle=on_idle)
+
+    try:
+        for headline, date, stock in events:
+            if aggregator.process(headline, date, stock):
+                if args.snapshot_every and aggregator.events % args.snapshot_every == 0:
+                    snapshot_requested = True
+                    flush_intraday()
+            on_idle()
+    except KeyboardInterrupt:
+        print("⏹️ Stream stopped.")
+
+    print(f"✅ Processed {aggregator.events} headlines (skipped {aggregator.skipped})")
+    write_snapshot()
+    flush_intraday(include_open=True)
+    save_output(aggregator.daily_sentiment(), args.output)
+
+
+if __name__ == "__main__":
+    main()
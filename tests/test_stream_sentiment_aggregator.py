@@ -0,0 +1,223 @@
+import math
+
+import pandas as pd
+import pytest
+from textblob import TextBlob
+
+from scripts.stream_sentiment_aggregator import (
+    RunningMean,
+    StreamingSentimentAggregator,
+    TickerState,
+    file_events,
+    main,
+    parse_args,
+    parse_json_record,
+    parse_timestamp,
+    tail_lines,
+    to_market_time,
+    trading_session,
+)
+
+
+def batch_daily_sentiment(path):
+    """Reference: steps 3 and 5 of aggregate_daily_sentiment_scores.py."""
+    df = pd.read_csv(path)
+
+    def analyze_sentiment(text):
+        if isinstance(text, str) and text.strip():
+            blob = TextBlob(text)
+            polarity = blob.sentiment.polarity
+            if polarity > 0:
+                sentiment = 'positive'
+            elif polarity < 0:
+                sentiment = 'negative'
+            else:
+                sentiment = 'neutral'
+            return pd.Series([polarity, sentiment])
+        else:
+            return pd.Series([None, 'neutral'])
+
+    df[['polarity', 'sentiment']] = df['headline'].apply(analyze_sentiment)
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    df = df.dropna(subset=['polarity', 'date'])
+    df_daily_sentiment = (
+        df.groupby([df['stock'], df['date'].dt.date])['polarity']
+        .mean()
+        .reset_index()
+    )
+    df_daily_sentiment.columns = ['Stock', 'Date', 'Avg_Sentiment']
+    return df_daily_sentiment
+
+
+@pytest.fixture
+def ratings_csv(tmp_path):
+    # Newest-first within each stock, like the analyst-ratings dump.
+    rows = [
+        ("Apple shares surge on great earnings", "2020-06-05 18:00:00-04:00", "AAPL"),
+        ("Apple faces terrible lawsuit", "2020-06-05 10:30:54-04:00", "AAPL"),
+        ("", "2020-06-05 11:00:00-04:00", "AAPL"),
+        ("Apple, Inc. \"good\" quarter", "not a date", "AAPL"),
+        ("Apple reports terrible quarter", "2020-01-15 00:30:00-04:00", "AAPL"),
+        ("Apple upgraded to buy, good outlook", "2020-01-14 22:00:00-04:00", "AAPL"),
+        ("Tesla recall is bad news", "2020-06-04 23:30:00-04:00", "TSLA"),
+        ("Tesla delivers amazing numbers", "2020-06-04 09:00:00-04:00", "TSLA"),
+        ("Tesla stock flat", "2020-06-03 12:00:00-04:00", "TSLA"),
+    ]
+    path = tmp_path / "ratings.csv"
+    pd.DataFrame(rows, columns=['headline', 'date', 'stock']).to_csv(path, index=False)
+    return path
+
+
+def test_running_mean():
+    m = RunningMean()
+    assert math.isnan(m.mean)
+    for value in [1e16, 1.0, -1e16, 0.5]:
+        m.add(value)
+    assert m.count == 4
+    assert m.sum == 1.5
+    assert m.mean == 0.375
+
+
+@pytest.mark.parametrize("time, expected", [
+    ("09:29:59", 'pre_market'),
+    ("09:30:00", 'regular'),
+    ("15:59:59", 'regular'),
+    ("16:00:00", 'after_hours'),
+])
+def test_trading_session_boundaries(time, expected):
+    assert trading_session(pd.Timestamp(f"2020-06-05 {time}")) == expected
+
+
+def test_parse_timestamp_keeps_own_offset():
+    ts = parse_timestamp("2020-01-15 00:30:00-04:00")
+    assert ts.date() == pd.Timestamp("2020-01-15").date()
+    assert to_market_time(ts) == pd.Timestamp("2020-01-14 23:30:00")
+    assert to_market_time(parse_timestamp("2020-05-22 00:00:00")) == pd.Timestamp("2020-05-22")
+    assert parse_timestamp("garbage") is None
+    assert parse_timestamp(None) is None
+    assert parse_timestamp([1, 2]) is None
+
+
+def test_ewma_half_life_decay():
+    state = TickerState(half_life=3600)
+    for ts, polarity in [(pd.Timestamp("2020-06-05 10:00"), 1.0), (pd.Timestamp("2020-06-05 11:00"), 0.0)]:
+        state.update(ts, ts.date(), polarity)
+    # The first headline is one half-life old, so it weighs 0.5 against 1.0.
+    assert state.ewma == pytest.approx(0.5 / 1.5)
+
+
+def test_ewma_independent_of_arrival_order():
+    events = [
+        (pd.Timestamp("2020-06-01 10:00"), -0.8),
+        (pd.Timestamp("2020-06-03 15:00"), 0.2),
+        (pd.Timestamp("2020-06-05 10:00"), 0.8),
+        (pd.Timestamp("2020-06-05 10:00"), 0.4),
+    ]
+    forward, backward = TickerState(86400), TickerState(86400)
+    for ts, polarity in events:
+        forward.update(ts, ts.date(), polarity)
+    for ts, polarity in reversed(events):
+        backward.update(ts, ts.date(), polarity)
+    assert backward.ewma == pytest.approx(forward.ewma)
+    assert backward.last_ts == forward.last_ts
+
+
+def test_half_life_must_be_positive():
+    with pytest.raises(ValueError):
+        StreamingSentimentAggregator(half_life=0)
+    with pytest.raises(SystemExit):
+        parse_args(['--file', 'x.csv', '--half-life', '-5'])
+
+
+def test_snapshot_every_must_be_non_negative():
+    assert parse_args(['--file', 'x.csv', '--snapshot-every', '0']).snapshot_every == 0
+    with pytest.raises(SystemExit):
+        parse_args(['--file', 'x.csv', '--snapshot-every', '-1'])
+
+
+def test_daily_sentiment_matches_batch(ratings_csv):
+    aggregator = StreamingSentimentAggregator()
+    for headline, date, stock in file_events(str(ratings_csv), follow=False):
+        aggregator.process(headline, date, stock)
+
+    expected = batch_daily_sentiment(ratings_csv)
+    result = aggregator.daily_sentiment()
+    assert aggregator.events == 7
+    assert aggregator.skipped == 2
+    assert result['Stock'].tolist() == expected['Stock'].tolist()
+    assert result['Date'].tolist() == expected['Date'].tolist()
+    assert result['Avg_Sentiment'].tolist() == pytest.approx(expected['Avg_Sentiment'].tolist())
+
+
+def test_mixed_timezones_use_own_offset_for_daily_key():
+    aggregator = StreamingSentimentAggregator()
+    aggregator.process("good news", "2020-06-04 23:30:00-05:00", "TSLA")
+    aggregator.process("bad news", "2020-06-05 00:00:00", "TSLA")
+    daily = aggregator.daily_sentiment()
+    assert daily['Date'].tolist() == [pd.Timestamp("2020-06-04").date(), pd.Timestamp("2020-06-05").date()]
+    assert aggregator.events == 2
+
+
+def test_late_headline_does_not_move_current_day():
+    aggregator = StreamingSentimentAggregator()
+    aggregator.process("good news", "2020-06-05 10:00:00-04:00", "AAPL")
+    aggregator.process("bad news", "2020-06-04 17:00:00-04:00", "AAPL")
+
+    state = aggregator.tickers['AAPL']
+    assert state.open_day == pd.Timestamp("2020-06-05").date()
+    assert list(state.hourly) == [10]
+    assert aggregator.drain_intraday()[0].empty
+    snapshot = aggregator.snapshot().iloc[0]
+    assert snapshot['Day'] == state.open_day
+    assert snapshot['Day_Count'] == 1
+    assert snapshot['Count'] == 2
+    assert len(aggregator.daily_sentiment().index) == 2
+
+
+def test_closed_day_buckets_are_evicted():
+    aggregator = StreamingSentimentAggregator()
+    aggregator.process("good news", "2020-06-04 10:00:00", "AAPL")
+    aggregator.process("bad news", "2020-06-04 17:00:00", "AAPL")
+    aggregator.process("good news", "2020-06-05 10:00:00", "AAPL")
+
+    state = aggregator.tickers['AAPL']
+    assert list(state.hourly) == [10]
+    assert list(state.sessions) == ['regular']
+    hourly, sessions = aggregator.drain_intraday()
+    assert hourly['Hour'].tolist() == [10, 17]
+    assert set(sessions['Session']) == {'regular', 'after_hours'}
+    assert aggregator.drain_intraday()[0].empty
+    assert len(aggregator.daily_sentiment().index) == 2
+
+
+def test_malformed_records_are_skipped():
+    aggregator = StreamingSentimentAggregator()
+    for line in [b'not json', b'[1, 2]', b'"text"', b'{"headline": "good", "date": "x", "stock": "A"}',
+                 b'{"headline": "good", "date": "2020-06-05 10:00:00-04:00", "stock": "A"}']:
+        aggregator.process(*parse_json_record(line))
+    assert aggregator.events == 1
+    assert aggregator.skipped == 4
+
+
+def test_tail_lines_partial_last_line(tmp_path):
+    path = tmp_path / "stream.csv"
+    path.write_text("headline,date,stock\ngood,2020-06-05,A\npartial", encoding='utf-8')
+    assert list(tail_lines(str(path), follow=False)) == [
+        "headline,date,stock\n", "good,2020-06-05,A\n", "partial"]
+
+
+def test_main_writes_outputs(ratings_csv, tmp_path):
+    out = tmp_path / "out"
+    main(['--file', str(ratings_csv), '--no-follow', '--snapshot-every', '2',
+          '--snapshot-path', str(out / "snapshot.csv"),
+          '--hourly-path', str(out / "hourly.csv"),
+          '--session-path', str(out / "sessions.csv"),
+          '--output', str(out / "daily.csv")])
+
+    daily = pd.read_csv(out / "daily.csv")
+    assert daily['Avg_Sentiment'].tolist() == pytest.approx(
+        batch_daily_sentiment(ratings_csv)['Avg_Sentiment'].tolist())
+    # Only the newest market day per ticker gets intraday buckets in a newest-first file.
+    hourly = pd.read_csv(out / "hourly.csv")
+    assert hourly.groupby('Stock')['Count'].sum().to_dict() == {'AAPL': 2, 'TSLA': 2}
+    assert set(pd.read_csv(out / "snapshot.csv")['Stock']) == {'AAPL', 'TSLA'}